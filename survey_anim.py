@@ -12,10 +12,17 @@ Then the actual animation data blobs follow, sized by the entries above.
 Cross-references with map .obj files to find which maps use buildings with these animations.
 """
 
+import mmap
 import struct
 import os
 import glob
-from collections import defaultdict
+import io
+import pickle
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import chain, compress
 
 
 # ============================================================================
@@ -27,13 +34,59 @@ MAP_DIR_1 = "/Users/anirudh/gamedev/pko-tools/top-client/corsairs-online-public/
 MAP_DIR_2 = "/Users/anirudh/gamedev/pko-tools/top-client/map/"
 SCENEOBJINFO_BIN = "/Users/anirudh/gamedev/pko-tools/top-client/scripts/table/sceneobjinfo.bin"
 
+# Parsed LMO results keyed by (mtime, size), so unchanged files are skipped on re-runs
+LMO_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".survey_anim_cache.pkl")
+
 # Maps to exclude from the report
-EXCLUDED_MAPS = {"garner", "magicsea", "darkblue", "garner2"}
+EXCLUDED_MAPS = frozenset({"garner", "magicsea", "darkblue", "garner2"})
 
 # Object types in LMO header table
 OBJ_TYPE_GEOMETRY = 1
 
 
+# ============================================================================
+# Binary layouts (compiled once; bound unpack_from for the hot paths)
+# ============================================================================
+
+_u32 = struct.Struct("<I").unpack_from
+_i32 = struct.Struct("<i").unpack_from
+_u32x2 = struct.Struct("<II").unpack_from
+_i32x2 = struct.Struct("<ii").unpack_from
+
+_LMO_OBJ_ENTRY = struct.Struct("<III")      # type, addr, size
+_LMO_GEOM_SIZES = struct.Struct("<IIII")    # mtl_size, mesh_size, helper_size, anim_size
+_LMO_ANIM_SIZES_V1005 = struct.Struct("<146I")
+_LMO_ANIM_SIZES_V1000 = struct.Struct("<130I")
+_MAP_SECTION_ENTRY = struct.Struct("<ii")   # offset, count
+_MAP_OBJ_RECORD = struct.Struct("<H18x")    # SSceneObjInfo: type/id word + padding
+
+
+# ============================================================================
+# File reading
+# ============================================================================
+
+def _read_all(path):
+    """Read a whole file for one sequential pass.
+
+    Where posix_fadvise exists (Linux, not macOS), the kernel is told to read
+    ahead aggressively and to drop the pages afterwards, so scanning thousands
+    of files doesn't evict everything else from the page cache.
+    """
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        size = os.fstat(fd).st_size
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        chunks = []
+        while chunk := os.read(fd, max(size, io.DEFAULT_BUFFER_SIZE)):
+            chunks.append(chunk)
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    return b"".join(chunks)
+
+
 # ============================================================================
 # sceneobjinfo.bin parser
 # ============================================================================
@@ -42,38 +95,26 @@ def parse_sceneobjinfo_bin(path):
     """Parse sceneobjinfo.bin, return dict: obj_id -> lmo_filename (lowercase)."""
     if not os.path.exists(path):
         return {}
-    with open(path, "rb") as f:
-        data = f.read()
+    data = _read_all(path)
     if len(data) < 4:
         return {}
 
-    entry_size = struct.unpack_from("<I", data, 0)[0]
-    if entry_size == 0:
+    entry_size = _u32(data, 0)[0]
+    # Each row must at least reach nID at offset 100
+    if entry_size < 104:
         return {}
 
-    data = data[4:]
-    entry_count = len(data) // entry_size
+    entry_count = (len(data) - 4) // entry_size
+    # Row layout: bExist at offset 0, szDataName[72] at offset 8, nID at offset 100
+    row = struct.Struct(f"<i4x72s20xI{entry_size - 104}x")
+    rows = memoryview(data)[4 : 4 + entry_count * entry_size]
     result = {}
 
-    for i in range(entry_count):
-        offset = i * entry_size
-        if offset + entry_size > len(data):
-            break
-        chunk = data[offset : offset + entry_size]
-
-        # bExist at offset 0
-        b_exist = struct.unpack_from("<i", chunk, 0)[0]
+    for b_exist, name_bytes, obj_id in row.iter_unpack(rows):
         if b_exist == 0:
             continue
 
-        # nID at offset 100
-        obj_id = struct.unpack_from("<I", chunk, 100)[0]
-
-        # szDataName at offset 8, max 72 bytes
-        name_bytes = chunk[8 : 8 + 72]
-        end = name_bytes.find(b"\x00")
-        if end >= 0:
-            name_bytes = name_bytes[:end]
+        name_bytes = name_bytes.split(b"\x00", 1)[0]
         filename = name_bytes.decode("utf-8", errors="replace").strip().lower()
 
         if filename:
@@ -92,112 +133,193 @@ def parse_obj_file(path):
     obj_type: 0=model, 1=effect
     obj_id: 14-bit ID referencing sceneobjinfo.bin
     """
-    with open(path, "rb") as f:
-        data = f.read()
+    data = _read_all(path)
 
     if len(data) < 44:
         return []
 
     # Header: title[16] + version(4) + file_size(4) + section_cnt_x(4) +
     # section_cnt_y(4) + section_width(4) + section_height(4) + section_obj_num(4)
-    version = struct.unpack_from("<i", data, 16)[0]
+    version = _i32(data, 16)[0]
     if version != 600:
         return []
 
-    section_cnt_x = struct.unpack_from("<i", data, 24)[0]
-    section_cnt_y = struct.unpack_from("<i", data, 28)[0]
+    section_cnt_x, section_cnt_y = _i32x2(data, 24)
     section_cnt = section_cnt_x * section_cnt_y
+    # Malformed header; a negative count would also wrap the index slice below
+    if section_cnt <= 0:
+        return []
 
     # Section index: offset(4) + count(4) per section
     idx_start = 44
     if idx_start + section_cnt * 8 > len(data):
         return []
 
-    section_offsets = []
-    section_counts = []
-    for s in range(section_cnt):
-        off = idx_start + s * 8
-        section_offsets.append(struct.unpack_from("<i", data, off)[0])
-        section_counts.append(struct.unpack_from("<i", data, off + 4)[0])
-
-    # Read objects -- each entry is 20 bytes (SSceneObjInfo with MSVC alignment)
-    placements = set()
-    for s in range(section_cnt):
-        count = section_counts[s]
-        offset = section_offsets[s]
+    # Read objects -- each entry is 20 bytes (SSceneObjInfo with MSVC alignment).
+    # Only the leading 16-bit type/id word matters; collect the distinct raw
+    # words per section in one pass and split them afterwards.
+    view = memoryview(data)
+    sections = view[idx_start : idx_start + section_cnt * 8]
+    raw_type_ids = set()
+    for offset, count in _MAP_SECTION_ENTRY.iter_unpack(sections):
         if count <= 0 or offset <= 0:
             continue
 
-        for j in range(count):
-            entry_off = offset + j * 20
-            if entry_off + 20 > len(data):
-                break
-            raw_type_id = struct.unpack_from("<h", data, entry_off)[0]
-            obj_type = (raw_type_id & 0xFFFF) >> 14
-            obj_id = (raw_type_id & 0xFFFF) & 0x3FFF
-            if obj_id > 0 and obj_type <= 1:
-                placements.add((obj_type, obj_id))
+        # Entries running past EOF are dropped
+        count = min(count, (len(data) - offset) // 20)
+        if count <= 0:
+            continue
+        records = view[offset : offset + count * 20]
+        raw_type_ids.update(chain.from_iterable(_MAP_OBJ_RECORD.iter_unpack(records)))
+
+    placements = []
+    for raw_type_id in raw_type_ids:
+        obj_type = raw_type_id >> 14
+        obj_id = raw_type_id & 0x3FFF
+        if obj_id > 0 and obj_type <= 1:
+            placements.append((obj_type, obj_id))
+
+    return placements
+
+
+# Animated model obj_ids, set once per map worker process by _init_map_worker
+_ANIM_IDS = frozenset()
 
-    return list(placements)
+
+def _init_map_worker(anim_ids):
+    global _ANIM_IDS
+    _ANIM_IDS = anim_ids
+
+
+def _scan_map_obj(path):
+    """Worker entry point: return (model placement count, animated model obj_ids) for a map."""
+    model_ids = {obj_id for obj_type, obj_id in parse_obj_file(path) if obj_type == 0}
+    return len(model_ids), model_ids & _ANIM_IDS
 
 
 # ============================================================================
 # LMO animation parser
 # ============================================================================
 
+@dataclass(slots=True)
 class AnimInfo:
-    """Parsed animation info for one geometry object in an LMO file."""
+    """Parsed animation info for one geometry object in an LMO file.
+
+    Sparse entries are stored as parallel tuples holding only nonzero sizes.
+    """
+
+    bone_size: int = 0
+    mat_size: int = 0
+    mtlopac_idx: tuple = ()       # subset
+    mtlopac_sz: tuple = ()
+    tu_s: tuple = ()              # texuv subset
+    tu_t: tuple = ()              # texuv stage
+    tu_sz: tuple = ()
+    ti_s: tuple = ()              # teximg subset
+    ti_t: tuple = ()              # teximg stage
+    ti_sz: tuple = ()
+
+
+# A [16][4] size table is flattened row-major: flat index k is (subset, stage) = (k >> 2, k & 3)
+_TABLE_SUBSETS = tuple(k >> 2 for k in range(64))
+_TABLE_STAGES = tuple(k & 3 for k in range(64))
+
+
+def _nonzero_2d(table):
+    """Split a flattened [16][4] size table into (subsets, stages, sizes) of nonzero entries."""
+    return (
+        tuple(compress(_TABLE_SUBSETS, table)),
+        tuple(compress(_TABLE_STAGES, table)),
+        tuple(filter(None, table)),
+    )
+
+
+def _decode_anim_sizes(sizes, mtlopac_count):
+    """Build an AnimInfo from a decoded size array, keeping only nonzero entries."""
+    info = AnimInfo(sizes[0], sizes[1])
 
-    def __init__(self):
-        self.bone_size = 0
-        self.mat_size = 0
-        self.mtlopac_sizes = []       # list of (subset, size)
-        self.texuv_sizes = []         # list of (subset, stage, size)
-        self.teximg_sizes = []        # list of (subset, stage, size)
+    # Most animated geometry is bone/mat only -- skip the sparse scans
+    if not any(sizes[2:]):
+        return info
+
+    off = 2
+    if mtlopac_count:
+        mtlopac = sizes[off : off + mtlopac_count]
+        info.mtlopac_idx = tuple(compress(range(mtlopac_count), mtlopac))
+        info.mtlopac_sz = tuple(filter(None, mtlopac))
+        off += mtlopac_count
+
+    # texuv_size[16][4]
+    info.tu_s, info.tu_t, info.tu_sz = _nonzero_2d(sizes[off : off + 64])
+    off += 64
+
+    # teximg_size[16][4]
+    info.ti_s, info.ti_t, info.ti_sz = _nonzero_2d(sizes[off : off + 64])
+    return info
 
 
 def parse_lmo_animations(path):
-    """Parse an LMO file and return list of (obj_index, AnimInfo) for objects with animation.
+    """Parse an LMO file and return (lmo_version, obj_num, results, any_bone_mat).
 
-    Skips v0x0 files (legacy format without size-array animation headers).
+    results: list of (obj_index, AnimInfo) for objects with texuv/teximg/mtlopac animation
+    any_bone_mat: True if any geometry object has a nonzero bone or mat animation size
+
+    Returns None if the file is too small to hold a version. v0x0 files (legacy
+    format without size-array animation headers) return (0, 0, [], False).
     """
     with open(path, "rb") as f:
-        data = f.read()
-
-    if len(data) < 8:
-        return []
-
-    lmo_version = struct.unpack_from("<I", data, 0)[0]
-    obj_num = struct.unpack_from("<I", data, 4)[0]
+        if os.fstat(f.fileno()).st_size < 4:
+            return None
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            # Some mounts (e.g. network shares) can't be mapped; read instead
+            return _parse_lmo_animations(_read_all(path))
+
+    try:
+        if hasattr(mmap, "MADV_RANDOM"):
+            # Only the version is needed to skip legacy files, so hold off on
+            # read-ahead until we know the rest will be parsed
+            data.madvise(mmap.MADV_RANDOM)
+            if _u32(data, 0)[0] != 0:
+                data.madvise(mmap.MADV_SEQUENTIAL)
+        return _parse_lmo_animations(data)
+    finally:
+        data.close()
+
+
+def _parse_lmo_animations(data):
+    """Parse animation size arrays from an LMO buffer (bytes or mmap)."""
+    lmo_version = _u32(data, 0)[0]
 
     # Skip legacy v0x0 format
-    if lmo_version == 0:
-        return []
+    if lmo_version == 0 or len(data) < 8:
+        return lmo_version, 0, [], False
 
+    obj_num = _u32(data, 4)[0]
     if obj_num > 500:
-        return []
+        return lmo_version, obj_num, [], False
 
     # Determine animation size-array format based on LMO version
     if lmo_version >= 0x1005:
         # 146 DWORDs: bone + mat + mtlopac[16] + texuv[16][4] + teximg[16][4]
-        n_entries = 146
-        has_mtlopac = True
+        anim_sizes = _LMO_ANIM_SIZES_V1005
         mtlopac_count = 16
     else:
         # 130 DWORDs: bone + mat + texuv[16][4] + teximg[16][4]
-        n_entries = 130
-        has_mtlopac = False
+        anim_sizes = _LMO_ANIM_SIZES_V1000
         mtlopac_count = 0
 
-    header_bytes = n_entries * 4
+    header_bytes = anim_sizes.size
     results = []
+    any_bone_mat = False
 
-    for i in range(obj_num):
-        tbl_off = 8 + i * 12
-        if tbl_off + 12 > len(data):
-            break
+    # Object table: decode every whole entry in one pass (a truncated table
+    # ends at the last complete entry)
+    table_len = min(obj_num, (len(data) - 8) // 12) * 12
+    obj_table = _LMO_OBJ_ENTRY.iter_unpack(data[8 : 8 + table_len])
 
-        typ, addr, size = struct.unpack_from("<III", data, tbl_off)
+    for i, (typ, addr, size) in enumerate(obj_table):
         if typ != OBJ_TYPE_GEOMETRY:
             continue
         if addr + 116 > len(data):
@@ -207,62 +329,69 @@ def parse_lmo_animations(path):
         sizes_offset = addr + 100
         if sizes_offset + 16 > len(data):
             continue
-        mtl_size, mesh_size, helper_size, anim_size = struct.unpack_from(
-            "<IIII", data, sizes_offset
+        mtl_size, mesh_size, helper_size, anim_size = _LMO_GEOM_SIZES.unpack_from(
+            data, sizes_offset
         )
 
         if anim_size == 0:
             continue
 
         anim_offset = addr + 116 + mtl_size + mesh_size + helper_size
+        if anim_offset + 8 > len(data):
+            continue
+
+        bone_size, mat_size = _u32x2(data, anim_offset)
+        if bone_size > 0 or mat_size > 0:
+            any_bone_mat = True
+
         if anim_offset + header_bytes > len(data):
             continue
 
-        # Read size array
-        info = AnimInfo()
-        off = anim_offset
-
-        info.bone_size = struct.unpack_from("<I", data, off)[0]
-        info.mat_size = struct.unpack_from("<I", data, off + 4)[0]
-        off += 8
-
-        if has_mtlopac:
-            for s in range(mtlopac_count):
-                val = struct.unpack_from("<I", data, off + s * 4)[0]
-                if val > 0:
-                    info.mtlopac_sizes.append((s, val))
-            off += mtlopac_count * 4
-
-        # texuv_size[16][4]
-        for s in range(16):
-            for t in range(4):
-                val = struct.unpack_from("<I", data, off + (s * 4 + t) * 4)[0]
-                if val > 0:
-                    info.texuv_sizes.append((s, t, val))
-        off += 16 * 4 * 4
-
-        # teximg_size[16][4]
-        for s in range(16):
-            for t in range(4):
-                val = struct.unpack_from("<I", data, off + (s * 4 + t) * 4)[0]
-                if val > 0:
-                    info.teximg_sizes.append((s, t, val))
+        # Read the whole size array in one unpack
+        sizes = anim_sizes.unpack_from(data, anim_offset)
 
         # Verify: header + sum of all sizes should equal anim_size
-        total = info.bone_size + info.mat_size
-        total += sum(sz for _, sz in info.mtlopac_sizes)
-        total += sum(sz for _, _, sz in info.texuv_sizes)
-        total += sum(sz for _, _, sz in info.teximg_sizes)
-        expected = header_bytes + total
+        expected = header_bytes + sum(sizes)
         if expected != anim_size:
             # Mismatch -- likely corrupt or misunderstood format, skip
             continue
 
+        info = _decode_anim_sizes(sizes, mtlopac_count)
+
         # Only report if there's texuv, teximg, or mtlopac data
-        if info.texuv_sizes or info.teximg_sizes or info.mtlopac_sizes:
+        if info.tu_sz or info.ti_sz or info.mtlopac_sz:
             results.append((i, info))
 
-    return results
+    return lmo_version, obj_num, results, any_bone_mat
+
+
+# ============================================================================
+# LMO parse cache
+# ============================================================================
+
+# Bump whenever the parse_lmo_animations result layout changes
+_LMO_CACHE_VERSION = 1
+
+
+def _load_lmo_cache(path):
+    """Load the LMO cache, return dict: lmo_path -> ((mtime_ns, size), parse result)."""
+    try:
+        with open(path, "rb") as f:
+            version, entries = pickle.load(f)
+    except Exception:
+        # Missing or unreadable cache just means everything is re-parsed
+        return {}
+    if version != _LMO_CACHE_VERSION:
+        return {}
+    return entries
+
+
+def _save_lmo_cache(path, entries):
+    try:
+        with open(path, "wb") as f:
+            pickle.dump((_LMO_CACHE_VERSION, entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass  # Best effort -- the next run re-parses
 
 
 # ============================================================================
@@ -274,9 +403,19 @@ def main():
     print("LMO Animation Survey: texuv / teximg / mtlopac")
     print("=" * 80)
 
+    # Report lines are buffered and written to stdout once per section
+    out = io.StringIO()
+
+    def flush():
+        sys.stdout.write(out.getvalue())
+        sys.stdout.flush()
+        out.seek(0)
+        out.truncate()
+
     # 1. Scan all LMO files
     lmo_files = sorted(glob.glob(os.path.join(SCENE_MODEL_DIR, "*.lmo")))
-    print(f"\nFound {len(lmo_files)} LMO files in scene model directory.")
+    print(f"\nFound {len(lmo_files)} LMO files in scene model directory.", file=out)
+    flush()
 
     # Track: lmo_filename (lowercase) -> list of (obj_idx, AnimInfo)
     lmo_anim_data = {}
@@ -286,94 +425,117 @@ def main():
     total_with_teximg = 0
     total_with_mtlopac = 0
     skipped_v0 = 0
+    # Files with bone/mat animation only (no texuv/teximg/mtlopac)
+    bone_mat_only_count = 0
 
+    # Reuse cached results for files unchanged since the last run
+    lmo_cache = _load_lmo_cache(LMO_CACHE_PATH)
+    new_cache = {}
+    stale = []
     for lmo_path in lmo_files:
-        total_scanned += 1
-        basename = os.path.basename(lmo_path).lower()
+        st = os.stat(lmo_path)
+        key = (st.st_mtime_ns, st.st_size)
+        cached = lmo_cache.get(lmo_path)
+        if cached is not None and cached[0] == key:
+            new_cache[lmo_path] = cached
+        else:
+            new_cache[lmo_path] = (key, None)
+            stale.append(lmo_path)
+
+    # Files are independent, so parse the stale ones across worker processes
+    if stale:
+        with ProcessPoolExecutor() as ex:
+            for lmo_path, parsed in zip(stale, ex.map(parse_lmo_animations, stale, chunksize=32)):
+                new_cache[lmo_path] = (new_cache[lmo_path][0], parsed)
+    if stale or new_cache.keys() != lmo_cache.keys():
+        _save_lmo_cache(LMO_CACHE_PATH, new_cache)
 
-        # Check version for skip
-        with open(lmo_path, "rb") as f:
-            ver_bytes = f.read(4)
-        if len(ver_bytes) < 4:
+    for lmo_path in lmo_files:
+        basename = os.path.basename(lmo_path).lower()
+        parsed = new_cache[lmo_path][1]
+        total_scanned += 1
+        if parsed is None:
             continue
-        ver = struct.unpack_from("<I", ver_bytes, 0)[0]
+        ver, _, anims, any_bone_mat = parsed
         if ver == 0:
             skipped_v0 += 1
             continue
 
-        anims = parse_lmo_animations(lmo_path)
         if anims:
             lmo_anim_data[basename] = anims
             total_with_anim += 1
-            has_texuv = any(a.texuv_sizes for _, a in anims)
-            has_teximg = any(a.teximg_sizes for _, a in anims)
-            has_mtlopac = any(a.mtlopac_sizes for _, a in anims)
+            has_texuv = any(a.tu_sz for _, a in anims)
+            has_teximg = any(a.ti_sz for _, a in anims)
+            has_mtlopac = any(a.mtlopac_sz for _, a in anims)
             if has_texuv:
                 total_with_texuv += 1
             if has_teximg:
                 total_with_teximg += 1
             if has_mtlopac:
                 total_with_mtlopac += 1
+        elif any_bone_mat:
+            bone_mat_only_count += 1
 
-    print(f"Scanned: {total_scanned}, Skipped v0x0: {skipped_v0}")
-    print(f"LMO files with texuv/teximg/mtlopac animations: {total_with_anim}")
-    print(f"  - with texuv:   {total_with_texuv}")
-    print(f"  - with teximg:  {total_with_teximg}")
-    print(f"  - with mtlopac: {total_with_mtlopac}")
+    print(f"Scanned: {total_scanned}, Skipped v0x0: {skipped_v0}", file=out)
+    print(f"LMO files with texuv/teximg/mtlopac animations: {total_with_anim}", file=out)
+    print(f"  - with texuv:   {total_with_texuv}", file=out)
+    print(f"  - with teximg:  {total_with_teximg}", file=out)
+    print(f"  - with mtlopac: {total_with_mtlopac}", file=out)
 
     # 2. Print detailed findings for each LMO
-    print("\n" + "=" * 80)
-    print("DETAILED FINDINGS: LMO files with texuv/teximg/mtlopac animation data")
-    print("=" * 80)
+    print("\n" + "=" * 80, file=out)
+    print("DETAILED FINDINGS: LMO files with texuv/teximg/mtlopac animation data", file=out)
+    print("=" * 80, file=out)
 
     for basename in sorted(lmo_anim_data.keys()):
         anims = lmo_anim_data[basename]
-        print(f"\n  {basename}:")
+        print(f"\n  {basename}:", file=out)
         for obj_idx, info in anims:
             parts = []
             if info.bone_size:
                 parts.append(f"bone={info.bone_size}")
             if info.mat_size:
                 parts.append(f"mat={info.mat_size}")
-            if info.mtlopac_sizes:
-                for s, sz in info.mtlopac_sizes:
+            if info.mtlopac_sz:
+                for s, sz in zip(info.mtlopac_idx, info.mtlopac_sz):
                     parts.append(f"mtlopac[{s}]={sz}")
-            if info.texuv_sizes:
-                for s, t, sz in info.texuv_sizes:
+            if info.tu_sz:
+                for s, t, sz in zip(info.tu_s, info.tu_t, info.tu_sz):
                     parts.append(f"texuv[{s}][{t}]={sz}")
-            if info.teximg_sizes:
-                for s, t, sz in info.teximg_sizes:
+            if info.ti_sz:
+                for s, t, sz in zip(info.ti_s, info.ti_t, info.ti_sz):
                     parts.append(f"teximg[{s}][{t}]={sz}")
-            print(f"    obj[{obj_idx}]: {', '.join(parts)}")
+            print(f"    obj[{obj_idx}]: {', '.join(parts)}", file=out)
+    flush()
 
     # 3. Parse sceneobjinfo.bin to map obj_id -> lmo_filename
-    print("\n" + "=" * 80)
-    print("CROSS-REFERENCE WITH MAP FILES")
-    print("=" * 80)
+    print("\n" + "=" * 80, file=out)
+    print("CROSS-REFERENCE WITH MAP FILES", file=out)
+    print("=" * 80, file=out)
 
     obj_id_to_lmo = parse_sceneobjinfo_bin(SCENEOBJINFO_BIN)
-    print(f"\nsceneobjinfo.bin: {len(obj_id_to_lmo)} entries loaded.")
+    print(f"\nsceneobjinfo.bin: {len(obj_id_to_lmo)} entries loaded.", file=out)
 
-    # Build reverse map: lmo_filename -> set of obj_ids
-    lmo_to_obj_ids = defaultdict(set)
+    # Build reverse map: lmo_filename -> list of obj_ids (obj_ids are unique keys)
+    obj_ids_by_lmo = {}
     for obj_id, lmo_name in obj_id_to_lmo.items():
-        lmo_to_obj_ids[lmo_name].add(obj_id)
+        obj_ids_by_lmo.setdefault(lmo_name, []).append(obj_id)
 
     # Find which obj_ids correspond to animated LMOs
     animated_obj_ids = set()
     obj_id_to_anim_lmo = {}
     for lmo_name in lmo_anim_data:
-        for obj_id in lmo_to_obj_ids.get(lmo_name, set()):
+        for obj_id in obj_ids_by_lmo.get(lmo_name, ()):
             animated_obj_ids.add(obj_id)
             obj_id_to_anim_lmo[obj_id] = lmo_name
 
-    print(f"Animated LMO files with sceneobjinfo entries: {len(set(lmo_anim_data.keys()) & set(lmo_to_obj_ids.keys()))}")
-    print(f"Total animated obj_ids: {len(animated_obj_ids)}")
+    print(f"Animated LMO files with sceneobjinfo entries: {len(lmo_anim_data.keys() & obj_ids_by_lmo.keys())}", file=out)
+    print(f"Total animated obj_ids: {len(animated_obj_ids)}", file=out)
 
     # LMOs with animations but no sceneobjinfo entry (can't appear in maps)
-    orphan_lmos = set(lmo_anim_data.keys()) - set(lmo_to_obj_ids.keys())
+    orphan_lmos = lmo_anim_data.keys() - obj_ids_by_lmo.keys()
     if orphan_lmos:
-        print(f"\nAnimated LMOs with NO sceneobjinfo entry (unused in maps): {sorted(orphan_lmos)}")
+        print(f"\nAnimated LMOs with NO sceneobjinfo entry (unused in maps): {sorted(orphan_lmos)}", file=out)
 
     # 4. Parse all map .obj files
     obj_files = []
@@ -382,112 +544,99 @@ def main():
             obj_files.extend(glob.glob(os.path.join(map_dir, "*.obj")))
     obj_files = sorted(set(obj_files))
 
-    print(f"\nFound {len(obj_files)} map .obj files.")
+    print(f"\nFound {len(obj_files)} map .obj files.", file=out)
+    flush()
 
     # map_name -> set of animated obj_ids placed
     map_to_animated = defaultdict(set)
     # map_name -> total model placements
     map_model_counts = {}
 
-    for obj_path in obj_files:
-        map_name = os.path.splitext(os.path.basename(obj_path))[0]
-        placements = parse_obj_file(obj_path)
-        model_placements = [(t, oid) for t, oid in placements if t == 0]
-        map_model_counts[map_name] = len(model_placements)
-
-        for obj_type, obj_id in placements:
-            if obj_type == 0 and obj_id in animated_obj_ids:
-                map_to_animated[map_name].add(obj_id)
+    # Workers receive the animated id set once at startup rather than per task
+    with ProcessPoolExecutor(
+        initializer=_init_map_worker, initargs=(frozenset(animated_obj_ids),)
+    ) as ex:
+        results = ex.map(_scan_map_obj, obj_files, chunksize=32)
+        for obj_path, (model_count, anim_ids) in zip(obj_files, results):
+            map_name = os.path.splitext(os.path.basename(obj_path))[0]
+            map_model_counts[map_name] = model_count
+            if anim_ids:
+                map_to_animated[map_name].update(anim_ids)
 
     # 5. Report maps with animated buildings
-    print("\n" + "=" * 80)
-    print("MAPS WITH ANIMATED BUILDINGS (texuv/teximg/mtlopac)")
-    print("=" * 80)
+    print("\n" + "=" * 80, file=out)
+    print("MAPS WITH ANIMATED BUILDINGS (texuv/teximg/mtlopac)", file=out)
+    print("=" * 80, file=out)
 
-    # Categorize into included and excluded
+    # Categorize into included and excluded; both keep the sorted insertion order
     included_maps = {}
     excluded_maps = {}
 
-    for map_name in sorted(map_to_animated.keys()):
-        anim_ids = map_to_animated[map_name]
-        total_models = map_model_counts.get(map_name, 0)
-        entry = {
-            "total_models": total_models,
+    for map_name, anim_ids in sorted(map_to_animated.items()):
+        target = excluded_maps if map_name.lower() in EXCLUDED_MAPS else included_maps
+        target[map_name] = {
+            "total_models": map_model_counts.get(map_name, 0),
             "animated_ids": anim_ids,
         }
-        if map_name.lower() in EXCLUDED_MAPS:
-            excluded_maps[map_name] = entry
-        else:
-            included_maps[map_name] = entry
 
     def print_map_details(map_name, entry):
         anim_ids = entry["animated_ids"]
         total = entry["total_models"]
-        print(f"\n  {map_name} ({total} unique model types, {len(anim_ids)} animated):")
+        print(f"\n  {map_name} ({total} unique model types, {len(anim_ids)} animated):", file=out)
         for obj_id in sorted(anim_ids):
             lmo_name = obj_id_to_anim_lmo.get(obj_id, "?")
             anims = lmo_anim_data.get(lmo_name, [])
             anim_types = set()
             for _, info in anims:
-                if info.texuv_sizes:
+                if info.tu_sz:
                     anim_types.add("texuv")
-                if info.teximg_sizes:
+                if info.ti_sz:
                     anim_types.add("teximg")
-                if info.mtlopac_sizes:
+                if info.mtlopac_sz:
                     anim_types.add("mtlopac")
-            print(f"    obj_id={obj_id} -> {lmo_name} [{', '.join(sorted(anim_types))}]")
+            print(f"    obj_id={obj_id} -> {lmo_name} [{', '.join(sorted(anim_types))}]", file=out)
 
-    print(f"\n--- INCLUDED MAPS ({len(included_maps)}) ---")
-    for map_name in sorted(included_maps.keys()):
-        print_map_details(map_name, included_maps[map_name])
+    print(f"\n--- INCLUDED MAPS ({len(included_maps)}) ---", file=out)
+    for map_name, entry in included_maps.items():
+        print_map_details(map_name, entry)
 
     if excluded_maps:
-        print(f"\n--- EXCLUDED MAPS ({len(excluded_maps)}) ---")
-        for map_name in sorted(excluded_maps.keys()):
-            print_map_details(map_name, excluded_maps[map_name])
+        print(f"\n--- EXCLUDED MAPS ({len(excluded_maps)}) ---", file=out)
+        for map_name, entry in excluded_maps.items():
+            print_map_details(map_name, entry)
+    flush()
 
     # 6. Summary of animation types
-    print("\n" + "=" * 80)
-    print("ANIMATION TYPE SUMMARY")
-    print("=" * 80)
+    print("\n" + "=" * 80, file=out)
+    print("ANIMATION TYPE SUMMARY", file=out)
+    print("=" * 80, file=out)
 
     # Aggregate stats
-    texuv_subsets = defaultdict(int)   # (subset, stage) -> count of LMOs
-    teximg_subsets = defaultdict(int)
-    mtlopac_subsets = defaultdict(int)  # subset -> count
+    texuv_subsets = Counter()   # (subset, stage) -> count of LMOs
+    teximg_subsets = Counter()
+    mtlopac_subsets = Counter()  # subset -> count
 
-    for basename, anims in lmo_anim_data.items():
-        seen_texuv = set()
-        seen_teximg = set()
-        seen_mtlopac = set()
-        for _, info in anims:
-            for s, t, sz in info.texuv_sizes:
-                seen_texuv.add((s, t))
-            for s, t, sz in info.teximg_sizes:
-                seen_teximg.add((s, t))
-            for s, sz in info.mtlopac_sizes:
-                seen_mtlopac.add(s)
-        for key in seen_texuv:
-            texuv_subsets[key] += 1
-        for key in seen_teximg:
-            teximg_subsets[key] += 1
-        for key in seen_mtlopac:
-            mtlopac_subsets[key] += 1
+    # Each LMO counts once per key, however many objects use it
+    for anims in lmo_anim_data.values():
+        texuv_subsets.update({key for _, info in anims for key in zip(info.tu_s, info.tu_t)})
+        teximg_subsets.update({key for _, info in anims for key in zip(info.ti_s, info.ti_t)})
+        mtlopac_subsets.update({s for _, info in anims for s in info.mtlopac_idx})
 
     if texuv_subsets:
-        print("\n  texuv animations by (subset, stage):")
+        print("\n  texuv animations by (subset, stage):", file=out)
         for key in sorted(texuv_subsets.keys()):
-            print(f"    subset={key[0]}, stage={key[1]}: {texuv_subsets[key]} LMO files")
+            print(f"    subset={key[0]}, stage={key[1]}: {texuv_subsets[key]} LMO files", file=out)
 
     if teximg_subsets:
-        print("\n  teximg animations by (subset, stage):")
+        print("\n  teximg animations by (subset, stage):", file=out)
         for key in sorted(teximg_subsets.keys()):
-            print(f"    subset={key[0]}, stage={key[1]}: {teximg_subsets[key]} LMO files")
+            print(f"    subset={key[0]}, stage={key[1]}: {teximg_subsets[key]} LMO files", file=out)
 
     if mtlopac_subsets:
-        print("\n  mtlopac animations by subset:")
+        print("\n  mtlopac animations by subset:", file=out)
         for key in sorted(mtlopac_subsets.keys()):
-            print(f"    subset={key}: {mtlopac_subsets[key]} LMO files")
+            print(f"    subset={key}: {mtlopac_subsets[key]} LMO files", file=out)
+    flush()
 
     # 7. Quick stats on bone-only vs texture-animated
     bone_only = 0
@@ -500,74 +649,17 @@ def main():
             # These already have texuv/teximg/mtlopac (that's why they're here)
             pass
 
-    # Also scan for files that ONLY have bone/mat animations (no texuv/teximg/mtlopac)
-    print("\n" + "=" * 80)
-    print("BONE/MAT-ONLY ANIMATION STATS (files without texuv/teximg/mtlopac)")
-    print("=" * 80)
+    # Files that ONLY have bone/mat animations (counted during the LMO scan)
+    print("\n" + "=" * 80, file=out)
+    print("BONE/MAT-ONLY ANIMATION STATS (files without texuv/teximg/mtlopac)", file=out)
+    print("=" * 80, file=out)
 
-    bone_mat_only_count = 0
-    for lmo_path in lmo_files:
-        basename = os.path.basename(lmo_path).lower()
-        if basename in lmo_anim_data:
-            continue  # Already has texuv/teximg/mtlopac
+    print(f"\n  LMO files with bone/mat animation only (no texuv/teximg/mtlopac): {bone_mat_only_count}", file=out)
 
-        with open(lmo_path, "rb") as f:
-            ver_bytes = f.read(4)
-        if len(ver_bytes) < 4:
-            continue
-        ver = struct.unpack_from("<I", ver_bytes, 0)[0]
-        if ver == 0:
-            continue
-
-        with open(lmo_path, "rb") as f:
-            data = f.read()
-        obj_num = struct.unpack_from("<I", data, 4)[0]
-        if obj_num > 500:
-            continue
-
-        if ver >= 0x1005:
-            n_entries = 146
-        else:
-            n_entries = 130
-        header_bytes = n_entries * 4
-
-        has_bone_or_mat = False
-        for i in range(obj_num):
-            tbl_off = 8 + i * 12
-            if tbl_off + 12 > len(data):
-                break
-            typ, addr, size = struct.unpack_from("<III", data, tbl_off)
-            if typ != OBJ_TYPE_GEOMETRY:
-                continue
-            if addr + 116 > len(data):
-                continue
-            sizes_offset = addr + 100
-            if sizes_offset + 16 > len(data):
-                continue
-            mtl_size, mesh_size, helper_size, anim_size = struct.unpack_from(
-                "<IIII", data, sizes_offset
-            )
-            if anim_size == 0:
-                continue
-
-            anim_offset = addr + 116 + mtl_size + mesh_size + helper_size
-            if anim_offset + 8 > len(data):
-                continue
-
-            bone_sz = struct.unpack_from("<I", data, anim_offset)[0]
-            mat_sz = struct.unpack_from("<I", data, anim_offset + 4)[0]
-            if bone_sz > 0 or mat_sz > 0:
-                has_bone_or_mat = True
-                break
-
-        if has_bone_or_mat:
-            bone_mat_only_count += 1
-
-    print(f"\n  LMO files with bone/mat animation only (no texuv/teximg/mtlopac): {bone_mat_only_count}")
-
-    print("\n" + "=" * 80)
-    print("DONE")
-    print("=" * 80)
+    print("\n" + "=" * 80, file=out)
+    print("DONE", file=out)
+    print("=" * 80, file=out)
+    flush()
 
 
 if __name__ == "__main__":